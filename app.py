@@ -1,11 +1,31 @@
 import streamlit as st
 import google.generativeai as genai
-from googleapiclient.discovery import build
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from google.api_core import exceptions as gapi_exceptions
+from googleapiclient.errors import HttpError
+from google.auth import exceptions as auth_exceptions
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import json
+import diskcache
+import hashlib
+import numpy as np
+import orjson
+import pandas as pd
+import queue
+import random
 import re
+import threading
+import time
+from types import MappingProxyType
+from typing import TypedDict
+
+_VIDEO_ID_RE = re.compile(r"(?:v=|/shorts/|youtu\.be/)([0-9A-Za-z_-]{11})")
+_BARE_ID_RE = re.compile(r"[0-9A-Za-z_-]{11}")
+_TS_FMT = "%Y-%m-%d %H:%M"
+# streamlit 1.49 起 st.dataframe 改用 width="stretch"，再傳 use_container_width 每次重跑都會噴 deprecation warning
+_DATAFRAME_STRETCH = (
+    {"width": "stretch"} if tuple(map(int, st.__version__.split(".")[:2])) >= (1, 49) else {"use_container_width": True}
+)
+SHEET_SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
 
 # --- 頁面設定 ---
 st.set_page_config(page_title="Shorts 流量獵手 (Veo專家版)", page_icon="🎬", layout="wide")
@@ -19,165 +39,702 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # --- 1. 初始化與讀取 Key ---
+# secrets 在 process 存活期間不會變，只在第一次讀取時複製一份
+# 所有 session 共用同一份，包成唯讀免得哪裡不小心改到
+@st.cache_resource
 def get_keys():
-    return {
+    gcp = st.secrets.get("gcp_service_account")
+    return MappingProxyType({
         "gemini": st.secrets.get("GEMINI_API_KEY"),
         "youtube": st.secrets.get("YOUTUBE_API_KEY"),
-        "gcp_json": dict(st.secrets["gcp_service_account"]) if "gcp_service_account" in st.secrets else None
-    }
+        "gcp_json": MappingProxyType(dict(gcp)) if gcp else None,
+        "sheet_id": st.secrets.get("SHEET_ID")
+    })
+
+# genai.configure 會改寫全域 client，每個 key 只需設定一次
+@st.cache_resource
+def init_genai(api_key):
+    genai.configure(api_key=api_key)
+    return True
 
 keys = get_keys()
+if keys["gemini"]: init_genai(keys["gemini"])
 
 # --- 2. 獲取可用模型 ---
-@st.cache_resource
+def key_fingerprint(api_key):
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+# 模型清單一天才會變一次；用 key 的 hash 當快取 key，避免把 secret 寫進快取
+@st.cache_data(ttl=86400, show_spinner=False)
+def _list_models_cached(key_hash):
+    return sorted((m.name for m in genai.list_models() if 'generateContent' in m.supported_generation_methods), reverse=True)
+
 def get_valid_models(api_key):
     if not api_key: return []
-    genai.configure(api_key=api_key)
-    valid_models = []
     try:
-        for m in genai.list_models():
-            if 'generateContent' in m.supported_generation_methods:
-                valid_models.append(m.name)
-    except:
-        pass
-    return sorted(valid_models, reverse=True)
-
-# --- 3. 核心工具 ---
-def clean_json_string(text):
-    text = text.replace("```json", "").replace("```", "")
-    start = text.find('{')
-    end = text.rfind('}')
-    if start != -1 and end != -1:
-        text = text[start:end+1]
-    return text.strip()
-
-def extract_video_id(input_str):
-    regex = r"(?:v=|\/shorts\/|\/youtu\.be\/|\/watch\?v=)([0-9A-Za-z_-]{11})"
-    match = re.search(regex, input_str)
-    return match.group(1) if match else None
-
-# --- 4. YouTube 搜尋 ---
+        return _list_models_cached(key_fingerprint(api_key))
+    except gapi_exceptions.GoogleAPIError as e:
+        st.error(f"讀取模型清單失敗: {e}")
+        return []
+
+# --- 3. API Client (每個 key 只建立一次) ---
+@st.cache_resource
+def get_youtube_client(api_key):
+    # discovery 會載入 httplib2 那一整串，第一次搜尋才 import，首頁不用等
+    from googleapiclient.discovery import build
+    # 用套件內附的 discovery 文件，冷啟動不必再連網抓
+    return build('youtube', 'v3', developerKey=api_key, cache_discovery=False, static_discovery=True)
+
+# 用 service account email 當快取 key，不必每次都 hash 整份含私鑰的 creds
+@st.cache_resource
+def get_sheet_client(client_email, _creds_dict):
+    # 只有存檔會用到 Sheets，延到第一次存檔才載入
+    import gspread
+    from google.oauth2.service_account import Credentials
+    creds = Credentials.from_service_account_info(_creds_dict, scopes=SHEET_SCOPE)
+    return gspread.authorize(creds)
+
+# 有設 SHEET_ID 就用 open_by_key，省掉 open(name) 背後那次 Drive 搜尋
+@st.cache_resource
+def get_worksheet(client_email, _creds_dict, sheet_id=None):
+    client = get_sheet_client(client_email, _creds_dict)
+    spreadsheet = client.open_by_key(sheet_id) if sheet_id else client.open("Shorts_Content_Planner")
+    return spreadsheet.sheet1
+
+# 搜尋與生成結果也寫一份到磁碟，server 重開後不必再花一次 quota / token
+@st.cache_resource
+def get_disk_cache():
+    return diskcache.Cache(".cache/shorts")
+
+# httplib2.Http 不是 thread-safe，不能讓所有 session 共用 client 身上那一條；
+# 改成連線池：用的時候借一條出來、用完放回去，同一條連線同時間只會跑一個 request，TLS 連線也能重複使用
+@st.cache_resource
+def get_http_pool():
+    return queue.SimpleQueue()
+
+# Streamlit 每次互動都會重跑整支 script，thread pool 要放在 cache_resource 才不會一直重建
+@st.cache_resource
+def get_executor():
+    return ThreadPoolExecutor(max_workers=4)
+
+# Sheets 寫入只開一個 worker：一批一批照送出的順序寫，列的順序才會跟搜尋結果一致
+@st.cache_resource
+def get_sheet_writer():
+    return ThreadPoolExecutor(max_workers=1)
+
+# 批次生成一批就要等好幾秒 (含重試退避)，另開一個 pool，不要佔住搜尋和 Sheets 寫入用的 worker
+@st.cache_resource
+def get_generation_executor():
+    return ThreadPoolExecutor(max_workers=4)
+
+# --- 4. 核心工具 ---
+# 只有 429 / 5xx 這類暫時性錯誤才重試，其他錯誤直接往上丟
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_ATTEMPTS = 5
+# append 不是 idempotent：5xx 可能是伺服器已經寫進去才出錯，重送會多一列；429 代表根本沒受理，可以放心重送
+APPEND_RETRY_STATUSES = frozenset({429})
+_GEMINI_ERRORS = (gapi_exceptions.GoogleAPIError, genai.types.BlockedPromptException, genai.types.StopCandidateException, ValueError)
+
+def execute_request(request):
+    pool = get_http_pool()
+    try:
+        http = pool.get_nowait()
+    except queue.Empty:
+        from googleapiclient.http import build_http
+        http = build_http()
+    try:
+        return with_retry(request.execute, http=http)
+    finally:
+        pool.put(http)
+
+def _disk_key(*parts):
+    return hashlib.blake2b(orjson.dumps(parts), digest_size=16).hexdigest()
+
+def _sheet_errors():
+    # gspread 是延遲載入的，except 只有在真的出錯時才會取這個 tuple
+    # APIError 屬於 GSpreadException、TransportError 屬於 GoogleAuthError；requests 的連線錯誤都是 OSError
+    import gspread
+    return (gspread.exceptions.GSpreadException, auth_exceptions.GoogleAuthError, OSError)
+
+def _youtube_errors():
+    # HttpError 以外，連線層的錯誤 (httplib2、逾時、SSL 都是 OSError) 也要顯示給使用者，不是程式 bug
+    import httplib2
+    return (HttpError, httplib2.HttpLib2Error, OSError)
+
+def _http_status(e):
+    if isinstance(e, HttpError): return e.resp.status
+    if isinstance(e, gapi_exceptions.GoogleAPICallError): return e.code
+    # gspread 的 APIError 帶著 requests 的 response
+    return getattr(getattr(e, 'response', None), 'status_code', None)
+
+def with_retry(fn, *args, retry_statuses=RETRY_STATUSES, **kwargs):
+    # 指數退避 + jitter，而不是直接叫使用者等一下再按
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if _http_status(e) not in retry_statuses or attempt == MAX_ATTEMPTS - 1: raise
+            time.sleep(min(30, 2 ** attempt + random.random()))
+
+def extract_json(text, opener='{'):
+    # 單次往前掃描，追蹤括號深度並略過字串裡的括號，回傳從第一個 opener 開始的完整區塊
+    # opener 由呼叫端指定 (單支 '{'、批次 '[')，模型在 JSON 前面多講的 [備註] 之類才不會被誤抓
+    start, depth, in_string, escape = -1, 0, False, False
+    for i, ch in enumerate(text):
+        if start == -1:
+            if ch == opener: start, depth = i, 1
+        elif in_string:
+            if escape: escape = False
+            elif ch == '\\': escape = True
+            elif ch == '"': in_string = False
+        elif ch == '"': in_string = True
+        elif ch in '{[': depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 0: return text[start:i+1]
+    return text[start:] if start != -1 else text.strip()
+
+def parse_llm_json(text, opener='{'):
+    # JSON mode 回來的本身就是合法 JSON，直接解；走純文字 fallback 的模型才需要掃描
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return orjson.loads(extract_json(text, opener))
+
+def extract_video_ids(input_str):
+    input_str = input_str.strip()
+    # 直接貼 11 碼 id 的情況不必跑 alternation
+    if len(input_str) == 11 and _BARE_ID_RE.fullmatch(input_str): return [input_str]
+    return list(dict.fromkeys(_VIDEO_ID_RE.findall(input_str)))
+
+# --- 5. YouTube 搜尋 ---
+def _to_video_list(items):
+    videos = []
+    for item in items:
+        vid = item['id']
+        stats = item.get('statistics', {})
+        view_count = int(stats.get('viewCount', 0))
+        if view_count > 1000000: view_str = f"{view_count/1000000:.1f}M views"
+        elif view_count > 1000: view_str = f"{view_count/1000:.1f}K views"
+        else: view_str = f"{view_count} views"
+
+        videos.append({
+            'id': vid,
+            'url': f"https://www.youtube.com/shorts/{vid}",
+            'title': item['snippet']['title'],
+            'thumbnail': item['snippet']['thumbnails']['high']['url'],
+            'channel': item['snippet']['channelTitle'],
+            'desc': item['snippet']['description'],
+            'views': view_str,
+            'date': item['snippet']['publishedAt'][:10],
+            'raw_views': view_count
+        })
+    return videos
+
+# 只取畫面用得到的欄位 (partial response)，加上 prettyPrint=False 拿掉縮排空白，回應小很多、解析也快
+_VIDEO_FIELDS = "items(id,snippet(title,description,channelTitle,publishedAt,thumbnails/high/url),statistics/viewCount)"
+
+# videos.list 一次最多 50 個 id，同樣只扣 1 quota
+def _fetch_video_chunk(youtube, chunk):
+    request = youtube.videos().list(part="snippet,statistics", id=",".join(chunk), fields=_VIDEO_FIELDS, prettyPrint=False)
+    return execute_request(request).get("items", [])
+
+def get_video_infos(video_ids, api_key):
+    youtube = get_youtube_client(api_key)
+    chunks = [video_ids[i:i+50] for i in range(0, len(video_ids), 50)]
+    # 超過 50 支才需要多個 request，交給 thread pool 一起送
+    if len(chunks) > 1:
+        pages = get_executor().map(lambda c: _fetch_video_chunk(youtube, c), chunks)
+    else:
+        pages = [_fetch_video_chunk(youtube, c) for c in chunks]
+    return {item['id']: item for page in pages for item in page}
+
+# 影片資料幾乎不變，快取 1 天；key_hash 讓換 key 時自動失效，底線參數不列入快取 key
+@st.cache_data(ttl=86400, max_entries=256, show_spinner=False)
+def _fetch_videos_cached(video_ids, key_hash, _api_key):
+    infos = get_video_infos(list(video_ids), _api_key)
+    return _to_video_list([infos[v] for v in video_ids if v in infos])
+
+# search.list 每次 100 quota，相同關鍵字 10 分鐘內直接讀快取
+@st.cache_data(ttl=600, max_entries=128, show_spinner=False)
+def _search_videos_cached(query, days_filter, max_results, key_hash, _api_key):
+    disk, disk_key = get_disk_cache(), _disk_key("search", query, days_filter, max_results, key_hash)
+    hit = disk.get(disk_key)
+    if hit is not None: return hit
+    youtube = get_youtube_client(_api_key)
+    published_after = (datetime.utcnow() - timedelta(days=days_filter)).isoformat("T") + "Z"
+    video_ids, page_token = [], None
+    # search.list 一頁最多 50 筆，超過就跟著 nextPageToken 往下翻
+    while len(video_ids) < max_results:
+        search_request = youtube.search().list(
+            q=query, type="video", part="id", fields="nextPageToken,items(id/videoId)",
+            maxResults=min(50, max_results - len(video_ids)), order="viewCount", videoDuration="short",
+            publishedAfter=published_after, pageToken=page_token, prettyPrint=False
+        )
+        search_response = execute_request(search_request)
+        video_ids += [item['id']['videoId'] for item in search_response.get("items", [])]
+        page_token = search_response.get("nextPageToken")
+        if not page_token: break
+    if not video_ids: return []
+    items = list(get_video_infos(video_ids, _api_key).values())
+    items.sort(key=lambda x: int(x.get('statistics', {}).get('viewCount', 0)), reverse=True)
+    videos = _to_video_list(items)
+    disk.set(disk_key, videos, expire=600, tag="search")
+    return videos
+
 def search_or_fetch_videos(api_key, query, days_filter=14, max_results=10):
+    if not api_key:
+        st.error("⚠️ 尚未設定 YOUTUBE_API_KEY")
+        return []
     try:
-        youtube = build('youtube', 'v3', developerKey=api_key)
-        videos = []
-        direct_vid = extract_video_id(query)
-        
-        if direct_vid:
-            response = youtube.videos().list(part="snippet,statistics", id=direct_vid).execute()
-            items = response.get("items", [])
-        else:
-            published_after = (datetime.utcnow() - timedelta(days=days_filter)).isoformat("T") + "Z"
-            search_response = youtube.search().list(
-                q=query, type="video", part="id,snippet",
-                maxResults=max_results, order="viewCount", videoDuration="short",
-                publishedAfter=published_after
-            ).execute()
-            video_ids = [item['id']['videoId'] for item in search_response.get("items", [])]
-            if not video_ids: return []
-            response = youtube.videos().list(part="snippet,statistics", id=",".join(video_ids)).execute()
-            items = response.get("items", [])
-            items.sort(key=lambda x: int(x['statistics'].get('viewCount', 0)), reverse=True)
-
-        for item in items:
-            vid = item['id']
-            stats = item.get('statistics', {})
-            view_count = int(stats.get('viewCount', 0))
-            if view_count > 1000000: view_str = f"{view_count/1000000:.1f}M views"
-            elif view_count > 1000: view_str = f"{view_count/1000:.1f}K views"
-            else: view_str = f"{view_count} views"
-            
-            videos.append({
-                'id': vid,
-                'url': f"https://www.youtube.com/shorts/{vid}",
-                'title': item['snippet']['title'],
-                'thumbnail': item['snippet']['thumbnails']['high']['url'],
-                'channel': item['snippet']['channelTitle'],
-                'desc': item['snippet']['description'],
-                'views': view_str,
-                'date': item['snippet']['publishedAt'][:10],
-                'raw_views': view_count
-            })
-        return videos
-    except Exception as e:
+        direct_vids = extract_video_ids(query)
+        if direct_vids:
+            videos = _fetch_videos_cached(tuple(direct_vids), key_fingerprint(api_key), api_key)
+            # 剛好 11 個字的關鍵字也會被當成 id，查不到就改走關鍵字搜尋
+            if videos or query.strip() != direct_vids[0]: return videos
+        return _search_videos_cached(query, days_filter, max_results, key_fingerprint(api_key), api_key)
+    except _youtube_errors() as e:
         st.error(f"YouTube API 錯誤: {e}")
         return []
 
-# --- 5. AI 生成 (Veo 專家級 Prompt 核心) ---
-def generate_creative_content(title, desc, api_key, model_name):
-    genai.configure(api_key=api_key)
+# --- 6. AI 生成 (Veo 專家級 Prompt 核心) ---
+# 生成快取：同一支影片直接命中 exact 層；標題/描述相近的影片走語意層，都省下整趟 Gemini 呼叫
+GEN_CACHE_TTL = 86400
+SEMANTIC_CACHE_THRESHOLD = 0.95
+EMBED_MODEL = "models/gemini-embedding-001"
+# embedding 失敗後暫停語意層一段時間，不要每次生成前都先白等一趟失敗的呼叫
+EMBED_COOLDOWN_SECONDS = 3600
+# 跟 YouTube 快取一樣要有上限，不然整個 process 活多久就長多大
+GEN_CACHE_MAX_ENTRIES = 500
+# 改了 _PROMPT_RULES 或 CreativeContent 就把版本加一：磁碟快取活過重開，cache_resource 也活過 hot reload
+# (它的 key 只看函式本身的原始碼)，所以版本要放進每一層的 key 和 get_genai_model 的參數，舊結果才會失效
+PROMPT_VERSION = 1
+
+@st.cache_resource
+def get_generation_cache():
+    return {"lock": threading.Lock(), "exact": {}, "models": {}, "embed_failed_at": None}
+
+def _embed_text(text):
+    emb = genai.embed_content(model=EMBED_MODEL, content=text)["embedding"]
+    vec = np.asarray(emb, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+# 只差在大小寫、多餘空白的標題/描述算同一筆，exact 層就能直接命中
+def gen_cache_key(model_name, title, desc):
+    norm = lambda t: re.sub(r"\s+", " ", t.strip().lower())
+    return (PROMPT_VERSION, model_name, norm(title), norm(desc))
+
+def exact_lookup(key):
+    cache = get_generation_cache()
+    with cache["lock"]:
+        hit = cache["exact"].get(key)
+        if hit and time.time() - hit[0] >= GEN_CACHE_TTL:
+            del cache["exact"][key]
+            hit = None
+    if hit: return dict(hit[1])
+    # 記憶體沒有再查磁碟，server 重開過也命中得到
+    return get_disk_cache().get(_disk_key("gen", *key))
+
+# 語意層依寫入順序排，過期的一定在最前面；順便把超過上限的最舊幾筆丟掉
+def _prune_semantic(entry, now):
+    times = entry["times"]
+    drop = 0
+    while drop < len(times) and now - times[drop] >= GEN_CACHE_TTL: drop += 1
+    drop = max(drop, len(times) - GEN_CACHE_MAX_ENTRIES)
+    if drop:
+        for k in ("times", "vectors", "results"): del entry[k][:drop]
+
+def semantic_lookup(model_name, vec):
+    cache = get_generation_cache()
+    with cache["lock"]:
+        entry = cache["models"].get((PROMPT_VERSION, model_name, EMBED_MODEL))
+        if not entry: return None
+        _prune_semantic(entry, time.time())
+        if not entry["vectors"]: return None
+        sims = np.stack(entry["vectors"]) @ vec
+        best = int(np.argmax(sims))
+        if sims[best] < SEMANTIC_CACHE_THRESHOLD: return None
+        return dict(entry["results"][best])
+
+def cache_store(key, vec, result):
+    cache = get_generation_cache()
+    get_disk_cache().set(_disk_key("gen", *key), dict(result), expire=GEN_CACHE_TTL, tag="gen")
+    now = time.time()
+    with cache["lock"]:
+        exact = cache["exact"]
+        # 先 pop 再放回去，dict 的順序就一直是寫入時間順序，最舊的在最前面
+        exact.pop(key, None)
+        exact[key] = (now, dict(result))
+        while len(exact) > GEN_CACHE_MAX_ENTRIES: del exact[next(iter(exact))]
+        if vec is None: return
+        # key[:2] 就是 (PROMPT_VERSION, model_name)；換 embedding 模型向量維度會變，也要分開放
+        entry = cache["models"].setdefault(key[:2] + (EMBED_MODEL,), {"times": [], "vectors": [], "results": []})
+        entry["times"].append(now)
+        entry["vectors"].append(vec)
+        entry["results"].append(dict(result))
+        _prune_semantic(entry, now)
+
+# === 專家級 Veo 指令結構 ===
+# 固定指令放 system_instruction，每次 request 只送影片資訊；前綴固定才吃得到 Gemini 的 implicit context caching
+_PROMPT_RULES = """You are a 'Google Veo Prompt Engineering Expert' and a 'Cinematographer'.
+
+TASK:
+Create a detailed prompt for Google Veo (VideoFX) to generate a high-quality, viral 8-10 second video.
+The goal is to create a visually satisfying, photorealistic, or artistically stunning derivative work.
+
+CRITICAL VEO PROMPT RULES (Apply these to 'veo_prompt'):
+1. **Structure:** [Camera Movement] + [Subject & Action] + [Lighting & Atmosphere] + [Technical Specs].
+2. **Lighting:** Use words like 'Volumetric lighting', 'Golden hour', 'Soft studio lighting', 'Cinematic chiaroscuro', 'Tyndall effect'.
+3. **Camera:** Use specific terms like 'Drone shot', 'Macro close-up', 'Low angle', 'Slow motion (60fps)', 'Dolly zoom', 'Rack focus'.
+4. **Texture:** Describe materials (e.g., 'fluffy fur', 'metallic sheen', 'translucent gel', 'rough concrete').
+5. **Continuity:** Describe a SINGLE continuous shot. Do not ask for cuts or edits.
+6. **Quality:** Always include: '4k resolution', 'highly detailed', 'photorealistic', 'shallow depth of field'.
+
+OUTPUT JSON ONLY:
+{
+    "title_en": "Punchy English Title (Short)",
+    "title_zh": "繁體中文標題 (吸睛)",
+    "veo_prompt": "THE EXPERT VEO PROMPT (English, detailed, cinematic keywords)",
+    "script_en": "Brief visual description of the scene",
+    "script_zh": "繁體中文畫面描述",
+    "tags": "#Tags (15-20 mixed)",
+    "comment": "Engaging comment"
+}
+"""
+
+# 給 JSON mode 的 response_schema，欄位跟上面的 OUTPUT JSON 一致
+class CreativeContent(TypedDict):
+    title_en: str
+    title_zh: str
+    veo_prompt: str
+    script_en: str
+    script_zh: str
+    tags: str
+    comment: str
+
+_VIDEO_CONTEXT_TMPL = """
+Original Video Context:
+- Title: {title}
+- Desc: {desc}
+"""
+
+# 一次把多支影片塞進同一個 request，分攤 TTFB 與固定指令的 token
+BATCH_SIZE = 8
+# 單一 session 同時送出的批次數，其他使用者的批次才排得進 generation pool
+BATCH_CONCURRENCY = 2
+_BATCH_HEADER_TMPL = """
+There are {n} source videos below. Return a JSON ARRAY with exactly {n} objects, in the same order,
+each following the OUTPUT JSON format from your instructions.
+"""
+_BATCH_VIDEO_TMPL = """
+[{i}] Title: {title}
+    Desc: {desc}
+"""
+
+def _generate(model, prompt, generation_config, on_chunk=None):
+    if not on_chunk: return with_retry(model.generate_content, prompt, generation_config=generation_config)
+
+    # 串流模式：每收到一段就回呼，畫面不用等整份 JSON 生完
+    def stream():
+        response = model.generate_content(prompt, generation_config=generation_config, stream=True)
+        buffer = ""
+        for chunk in response:
+            # .text 遇到沒有 parts 的 chunk (例如最後只帶 finish_reason / usage 的那段) 會丟 ValueError，直接從 parts 組
+            buffer += "".join(p.text for c in chunk.candidates[:1] for p in c.content.parts)
+            on_chunk(buffer)
+        return response
+    return with_retry(stream)
+
+@st.cache_resource
+def get_genai_model(api_key, model_name, prompt_version, json_mode=True):
+    # prompt_version 只用來當快取 key，改版後才會重建帶新 system_instruction 的 model
+    init_genai(api_key)
     # 稍微調低 temperature 讓指令更精確，不要太發散
-    generation_config = genai.types.GenerationConfig(temperature=0.75, top_p=0.95, top_k=40)
-    model = genai.GenerativeModel(model_name, generation_config=generation_config)
-    
-    # === 專家級 Veo 指令結構 ===
-    prompt = f"""
-    You are a 'Google Veo Prompt Engineering Expert' and a 'Cinematographer'.
-    
-    Original Video Context:
-    - Title: {title}
-    - Desc: {desc}
-    
-    TASK: 
-    Create a detailed prompt for Google Veo (VideoFX) to generate a high-quality, viral 8-10 second video.
-    The goal is to create a visually satisfying, photorealistic, or artistically stunning derivative work.
-    
-    CRITICAL VEO PROMPT RULES (Apply these to 'veo_prompt'):
-    1. **Structure:** [Camera Movement] + [Subject & Action] + [Lighting & Atmosphere] + [Technical Specs].
-    2. **Lighting:** Use words like 'Volumetric lighting', 'Golden hour', 'Soft studio lighting', 'Cinematic chiaroscuro', 'Tyndall effect'.
-    3. **Camera:** Use specific terms like 'Drone shot', 'Macro close-up', 'Low angle', 'Slow motion (60fps)', 'Dolly zoom', 'Rack focus'.
-    4. **Texture:** Describe materials (e.g., 'fluffy fur', 'metallic sheen', 'translucent gel', 'rough concrete').
-    5. **Continuity:** Describe a SINGLE continuous shot. Do not ask for cuts or edits.
-    6. **Quality:** Always include: '4k resolution', 'highly detailed', 'photorealistic', 'shallow depth of field'.
-    
-    OUTPUT JSON ONLY:
-    {{
-        "title_en": "Punchy English Title (Short)",
-        "title_zh": "繁體中文標題 (吸睛)",
-        "veo_prompt": "THE EXPERT VEO PROMPT (English, detailed, cinematic keywords)",
-        "script_en": "Brief visual description of the scene",
-        "script_zh": "繁體中文畫面描述",
-        "tags": "#Tags (15-20 mixed)",
-        "comment": "Engaging comment"
-    }}
-    """
+    if not json_mode:
+        # 不支援 JSON mode / system_instruction 的模型：指令改放在 prompt 最前面，輸出交給 parse_llm_json 撈
+        return genai.GenerativeModel(model_name, generation_config=genai.types.GenerationConfig(temperature=0.75, top_p=0.95, top_k=40))
+    # JSON mode：模型保證回傳合法 JSON，不會再夾 ```json 圍欄或前後說明文字
+    generation_config = genai.types.GenerationConfig(
+        temperature=0.75, top_p=0.95, top_k=40, response_mime_type="application/json"
+    )
+    return genai.GenerativeModel(model_name, generation_config=generation_config, system_instruction=_PROMPT_RULES)
+
+# 已知不支援 JSON mode 的模型，之後直接走純文字，不必每次先吃一個 400
+@st.cache_resource
+def get_plain_text_models():
+    return set()
+
+def _call_gemini(api_key, model_name, prompt, schema, on_chunk=None):
+    plain_models = get_plain_text_models()
+    if model_name not in plain_models:
+        try:
+            # 只覆寫 response_schema，其他 generation_config 沿用 model 上的設定
+            return _generate(get_genai_model(api_key, model_name, PROMPT_VERSION), prompt, {"response_schema": schema}, on_chunk)
+        except gapi_exceptions.InvalidArgument:
+            pass  # 不支援 response_mime_type / schema / system_instruction 的模型會回 400，改用純文字再試一次
+    response = _generate(get_genai_model(api_key, model_name, PROMPT_VERSION, json_mode=False), _PROMPT_RULES + prompt, None, on_chunk)
+    plain_models.add(model_name)
+    return response
+
+def generate_creative_content(title, desc, api_key, model_name, on_chunk=None):
+    cache_key = gen_cache_key(model_name, title, desc)
+    cached = exact_lookup(cache_key)
+    vec = None
+    if not cached:
+        gen_cache = get_generation_cache()
+        failed_at = gen_cache["embed_failed_at"]
+        if failed_at is None or time.time() - failed_at >= EMBED_COOLDOWN_SECONDS:
+            try:
+                vec = _embed_text(f"{title}|{desc}")
+                gen_cache["embed_failed_at"] = None
+            except _GEMINI_ERRORS as e:
+                # embedding 失敗就當作沒命中，照常生成；這段時間內先跳過語意層
+                gen_cache["embed_failed_at"] = time.time()
+                st.toast(f"語意快取暫停使用: {e}", icon="⚠️")
+        if vec is not None: cached = semantic_lookup(model_name, vec)
+    if cached:
+        cached['token_usage'] = {"input": 0, "output": 0, "total": 0}
+        return cached
+
+    prompt = _VIDEO_CONTEXT_TMPL.format(title=title, desc=desc)
     try:
-        response = model.generate_content(prompt)
+        response = _call_gemini(api_key, model_name, prompt, CreativeContent, on_chunk)
         usage = response.usage_metadata
         token_info = {"input": usage.prompt_token_count, "output": usage.candidates_token_count, "total": usage.total_token_count}
-        result = json.loads(clean_json_string(response.text))
+        result = parse_llm_json(response.text)
+        if not isinstance(result, dict): raise ValueError("模型沒有回傳 JSON 物件")
         result['token_usage'] = token_info
+        cache_store(cache_key, vec, result)
         return result
-    except Exception as e:
+    except _GEMINI_ERRORS as e:
         return {"error": str(e)}
 
-# --- 6. 存檔 (維持省錢版結構：Kling 留白) ---
-def save_to_sheet(data, creds_dict):
+def generate_creative_content_batch(videos, api_key, model_name):
+    videos = videos[:BATCH_SIZE]
+    # 先查快取，只把沒命中的影片送給 Gemini，最後再照原本的順序合併回去
+    cache_keys = [gen_cache_key(model_name, v['title'], v['desc']) for v in videos]
+    results = [exact_lookup(k) for k in cache_keys]
+    misses = [i for i, r in enumerate(results) if r is None]
+    for r in results:
+        if r: r.pop('token_usage', None)
+    if not misses: return {"results": results, "token_usage": {"input": 0, "output": 0, "total": 0}}
+
+    todo = [videos[i] for i in misses]
+    prompt = _BATCH_HEADER_TMPL.format(n=len(todo)) + "".join(
+        _BATCH_VIDEO_TMPL.format(i=i, title=v['title'], desc=v['desc']) for i, v in enumerate(todo, 1)
+    )
+    try:
+        response = _call_gemini(api_key, model_name, prompt, list[CreativeContent])
+        usage = response.usage_metadata
+        token_info = {"input": usage.prompt_token_count, "output": usage.candidates_token_count, "total": usage.total_token_count}
+        fresh = parse_llm_json(response.text, '[')
+        if not isinstance(fresh, list) or len(fresh) != len(todo):
+            return {"error": f"預期 {len(todo)} 筆結果，實際收到 {len(fresh) if isinstance(fresh, list) else 0} 筆"}
+        if not all(isinstance(r, dict) for r in fresh):
+            return {"error": "模型回傳的陣列裡有不是 JSON 物件的項目"}
+        for i, result in zip(misses, fresh):
+            cache_store(cache_keys[i], None, result)
+            results[i] = result
+        return {"results": results, "token_usage": token_info}
+    except _GEMINI_ERRORS as e:
+        return {"error": str(e)}
+
+# --- 7. 存檔 (維持省錢版結構：Kling 留白) ---
+# 先放進 session_state 佇列，累積到一定筆數或放超過一段時間再用 append_rows 一次寫入
+SHEET_FLUSH_SIZE = 5
+SHEET_FLUSH_SECONDS = 10
+
+def append_rows(creds_dict, rows):
+    import gspread
+    from gspread.utils import absolute_range_name
+    if not creds_dict: raise gspread.exceptions.GSpreadException("尚未設定 gcp_service_account")
+    sheet = get_worksheet(creds_dict['client_email'], creds_dict, keys['sheet_id'])
+    # 直接打 values.append 並把範圍限定在 A 欄，API 只需找 A 欄的資料表尾端，不用掃整張表
+    with_retry(
+        sheet.spreadsheet.values_append, absolute_range_name(sheet.title, "A:A"),
+        params={'valueInputOption': 'RAW', 'insertDataOption': 'INSERT_ROWS'}, body={'values': rows},
+        retry_statuses=APPEND_RETRY_STATUSES
+    )
+
+def flush_pending(creds_dict):
+    rows = st.session_state.get('pending_rows', [])
+    if not rows: return True
     try:
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        client = gspread.authorize(creds)
-        sheet = client.open("Shorts_Content_Planner").sheet1
-        
-        # A-J 欄位
-        row = [
-            str(datetime.now())[:16],
-            data.get('url', ''),
-            data.get('title_en', ''),
-            data.get('title_zh', ''),
-            data.get('veo_prompt', ''),
-            "",  # Kling 欄位留白
-            data.get('script_en', ''),
-            data.get('script_zh', ''),
-            data.get('tags', ''),
-            data.get('comment', '')
-        ]
-        sheet.append_row(row)
+        append_rows(creds_dict, rows)
+        st.session_state.pending_rows = []
         return True
-    except Exception as e:
+    except _sheet_errors() as e:
         st.error(f"寫入 Google Sheets 失敗: {e}")
         return False
 
+def _to_row(data):
+    # A-J 欄位
+    return [
+        datetime.now().strftime(_TS_FMT),
+        data.get('url', ''),
+        data.get('title_en', ''),
+        data.get('title_zh', ''),
+        data.get('veo_prompt', ''),
+        "",  # Kling 欄位留白
+        data.get('script_en', ''),
+        data.get('script_zh', ''),
+        data.get('tags', ''),
+        data.get('comment', '')
+    ]
+
+# 所有進佇列的資料都走這裡，佇列從空變成有資料時才開始計時
+def _enqueue_rows(rows):
+    pending = st.session_state.setdefault('pending_rows', [])
+    if not pending: st.session_state.pending_since = time.monotonic()
+    pending.extend(rows)
+    return pending
+
+_NO_CREDS_MSG = "寫入 Google Sheets 失敗: 尚未設定 gcp_service_account"
+
+def save_to_sheet(data, creds_dict):
+    # 沒有 service account 的話排進佇列也永遠寫不出去，當下就告訴使用者
+    if not creds_dict:
+        st.error(_NO_CREDS_MSG)
+        return False
+    pending = _enqueue_rows([_to_row(data)])
+    now = time.monotonic()
+    if len(pending) >= SHEET_FLUSH_SIZE or now - st.session_state.get('pending_since', now) >= SHEET_FLUSH_SECONDS:
+        return flush_pending(creds_dict)
+    return True
+
+# 佇列不是只在下一次存檔時才檢查：這個 fragment 每 SHEET_FLUSH_SECONDS 秒自己跑一次，放太久的資料就寫進去
+@st.fragment(run_every=SHEET_FLUSH_SECONDS)
+def auto_flush():
+    if not keys['gcp_json'] or not st.session_state.get('pending_rows'): return
+    now = time.monotonic()
+    if now - st.session_state.get('pending_since', now) < SHEET_FLUSH_SECONDS: return
+    if flush_pending(keys['gcp_json']): st.toast("✅ 資料已成功寫入 Google Sheets!", icon="💾")
+    else: st.session_state.pending_since = now  # 寫入失敗就等下一輪再試
+
+def show_cost(u):
+    cost_twd = ((u['input']/1e6 * 2.0) + (u['output']/1e6 * 12.0)) * 32.5
+    st.markdown(f"""
+    <div class="cost-box">
+        <b>💰 本次成本:</b> 輸入 {u['input']} / 輸出 {u['output']}<br>
+        <b>預估費用: {cost_twd:.4f} TWD</b>
+    </div>
+    """, unsafe_allow_html=True)
+
+# 換影片或重新搜尋時要清掉的生成結果
+_AI_KEYS = frozenset(('ai_data_full', 'ai_batch_results', 'ai_batch_usage'))
+
+def _reset_ai_state():
+    for k in _AI_KEYS & st.session_state.keys(): del st.session_state[k]
+
+# 詳細欄用 fragment 包起來：裡面的按鈕/輸入框只重跑這一塊，不會整頁重跑
+@st.fragment
+def render_detail(selected):
+    st.info(f"✅ 當前分析：{selected['title']}")
+    # 先只放縮圖，按了播放才嵌 YouTube player，不必每次重跑都載一整個 iframe
+    if st.session_state.get('playing_id') == selected['id']:
+        st.video(selected['url'])
+    else:
+        st.image(selected['thumbnail'])
+        if st.button("▶️ 播放影片", key=f"play_{selected['id']}"):
+            st.session_state.playing_id = selected['id']
+            st.rerun(scope="fragment")
+
+    # 模型清單快取一天，有新模型上線時可以手動重抓
+    if st.button("🔄 更新模型清單"): _list_models_cached.clear()
+    model_options = get_valid_models(keys["gemini"])
+    selected_model_name = st.selectbox("🤖 選擇 AI 模型 (建議選 3.0 Pro)", model_options)
+
+    if st.button("✨ 生成 Veo 專家級腳本 (自動存檔)", type="primary"):
+        if not selected_model_name: st.error("請檢查 AI 模型")
+        else:
+            with st.spinner("AI 導演正在構思分鏡與光影..."):
+                # Gemini 生成期間先在背景完成 Sheets 授權，存檔時不用再等
+                if keys['gcp_json']: get_executor().submit(get_worksheet, keys['gcp_json']['client_email'], keys['gcp_json'], keys['sheet_id'])
+                stream_box = st.empty()
+                ai_data = generate_creative_content(
+                    selected['title'], selected['desc'], keys['gemini'], selected_model_name,
+                    on_chunk=lambda buf: stream_box.code(buf, language="json")
+                )
+                stream_box.empty()
+
+                if "error" not in ai_data:
+                    ai_data['url'] = selected['url'] 
+                    st.session_state.ai_data_full = ai_data
+                    if save_to_sheet(ai_data, keys['gcp_json']):
+                        pending = len(st.session_state.pending_rows)
+                        if pending: st.toast(f"📝 已加入待寫入佇列 ({pending}/{SHEET_FLUSH_SIZE})", icon="💾")
+                        else: st.toast("✅ 資料已成功寫入 Google Sheets!", icon="💾")
+                else:
+                    st.error(f"生成失敗: {ai_data['error']}")
+
+    videos = st.session_state.search_results
+    if st.button(f"✨ 一次生成全部 {len(videos)} 支 (自動存檔)"):
+        if not selected_model_name: st.error("請檢查 AI 模型")
+        else:
+            batch_results, batch_usage, writes = [], {"input": 0, "output": 0, "total": 0}, []
+            with st.spinner(f"AI 導演正在一次構思 {len(videos)} 支影片..."):
+                if keys['gcp_json']: get_executor().submit(get_worksheet, keys['gcp_json']['client_email'], keys['gcp_json'], keys['sheet_id'])
+                # 每批是獨立的 request，最多 BATCH_CONCURRENCY 批同時生成；收到一批就補送下一批
+                chunks = [videos[i:i+BATCH_SIZE] for i in range(0, len(videos), BATCH_SIZE)]
+                submit = lambda c: get_generation_executor().submit(generate_creative_content_batch, c, keys['gemini'], selected_model_name)
+                futures = [submit(c) for c in chunks[:BATCH_CONCURRENCY]]
+                for i, chunk in enumerate(chunks):
+                    batch = futures[i].result()
+                    if i + BATCH_CONCURRENCY < len(chunks): futures.append(submit(chunks[i + BATCH_CONCURRENCY]))
+                    if "error" in batch:
+                        st.error(f"生成失敗: {batch['error']}")
+                        continue
+                    rows = []
+                    for vid, item in zip(chunk, batch['results']):
+                        item['url'] = vid['url']
+                        batch_results.append(item)
+                        rows.append(_to_row(item))
+                    for k in batch_usage: batch_usage[k] += batch['token_usage'][k]
+                    # 寫入走單一 worker 的 writer，不會排在還沒生成完的批次後面，也不會跟上一批搶先後
+                    if keys['gcp_json']: writes.append((rows, get_sheet_writer().submit(append_rows, keys['gcp_json'], rows)))
+                failed = []
+                for rows, fut in writes:
+                    try: fut.result()
+                    except _sheet_errors() as e:
+                        failed.extend(rows)
+                        st.error(f"寫入 Google Sheets 失敗: {e}")
+            if failed: _enqueue_rows(failed)
+            if batch_results and not keys['gcp_json']: st.error(_NO_CREDS_MSG)
+            if batch_results:
+                st.session_state.ai_batch_results = batch_results
+                st.session_state.ai_batch_usage = batch_usage
+                if writes and not failed: st.toast(f"✅ {len(batch_results)} 筆資料已寫入 Google Sheets!", icon="💾")
+
+    pending = len(st.session_state.get('pending_rows', []))
+    if pending and st.button(f"💾 立即寫入 Google Sheets ({pending} 筆)"):
+        if flush_pending(keys['gcp_json']):
+            st.toast("✅ 資料已成功寫入 Google Sheets!", icon="💾")
+            st.rerun(scope="fragment")
+
+    if 'ai_data_full' in st.session_state:
+        data = st.session_state.ai_data_full
+        if 'token_usage' in data: show_cost(data['token_usage'])
+
+        st.subheader("🎨 生成內容 (Veo 專家指令)")
+
+        # 優化顯示：直接讓使用者好複製
+        st.info("💡 請複製下方指令，貼到 VideoFX (Gemini Advanced)：")
+        st.code(data.get('veo_prompt',''), language="text")
+
+        st.divider()
+        st.text_input("中文標題", value=data.get('title_zh',''))
+        st.text_area("中文腳本", value=data.get('script_zh',''), height=120)
+        st.text_area("SEO 標籤", value=data.get('tags',''), height=60)
+
+    if 'ai_batch_results' in st.session_state:
+        st.divider()
+        st.subheader(f"📦 批次生成結果 ({len(st.session_state.ai_batch_results)} 支)")
+        show_cost(st.session_state.ai_batch_usage)
+        for d in st.session_state.ai_batch_results:
+            with st.expander(d.get('title_zh') or d.get('title_en') or d['url']):
+                st.caption(d.get('url', ''))
+                st.code(d.get('veo_prompt', ''), language="text")
+
 # --- 主介面 ---
 st.title("💰 Shorts 流量獵手 (Veo 專家版)")
 
@@ -186,20 +743,32 @@ if not keys["gemini"]:
 else:
     # 搜尋區塊
     with st.container():
-        c1, c2, c3 = st.columns([2, 1, 1])
+        c1, c2, c3, c4, c5 = st.columns([2, 1, 1, 1, 1])
         with c1: query_input = st.text_input("🔍 輸入關鍵字", value="oddly satisfying")
         with c2: days_opt = st.selectbox("📅 搜尋範圍", [7, 14, 30], index=1, format_func=lambda x: f"最近 {x} 天")
-        with c3:
+        with c3: count_opt = st.selectbox("🎞️ 影片數量", [10, 25, 50, 100], format_func=lambda x: f"{x} 支")
+        with c4:
+            st.write(""); st.write("")
+            run_search = st.button("🚀 挖掘爆紅影片", type="primary")
+        with c5:
             st.write(""); st.write("")
-            if st.button("🚀 挖掘爆紅影片", type="primary"):
-                with st.spinner("掃描中..."):
-                    results = search_or_fetch_videos(keys['youtube'], query_input, days_filter=days_opt)
-                    if results:
-                        st.session_state.search_results = results
-                        st.session_state.selected_video = results[0]
-                        for k in list(st.session_state.keys()):
-                            if k.startswith('ai_'): del st.session_state[k]
-                    else: st.warning("找不到影片")
+            if st.button("🔄 忽略快取重抓"):
+                _search_videos_cached.clear()
+                _fetch_videos_cached.clear()
+                get_disk_cache().evict("search")
+                run_search = True
+        if run_search:
+            # 搜完第一件事就是選模型，趁 YouTube 還在跑先在背景把模型清單抓進快取
+            get_executor().submit(_list_models_cached, key_fingerprint(keys['gemini']))
+            with st.spinner("掃描中..."):
+                results = search_or_fetch_videos(keys['youtube'], query_input, days_filter=days_opt, max_results=count_opt)
+                if results:
+                    st.session_state.search_results = results
+                    st.session_state.selected_video = results[0]
+                    # 換了一批結果，舊的列選擇要清掉
+                    st.session_state.pop('video_table', None)
+                    _reset_ai_state()
+                else: st.warning("找不到影片")
 
     # 內容區塊
     if 'search_results' in st.session_state and st.session_state.search_results:
@@ -207,61 +776,27 @@ else:
         col_list, col_detail = st.columns([1.5, 2])
 
         with col_list:
-            st.markdown(f"### 🔥 熱門影片列表")
-            for vid in st.session_state.search_results:
-                is_viral = vid['raw_views'] > 500000
-                viral_badge = "🔥 " if is_viral else ""
-                st.markdown(f"**{viral_badge}[{vid['title']}]({vid['url']})**")
-                st.markdown(f"<span class='stat-box'>👁️ {vid['views']}</span> <span class='stat-box'>📅 {vid['date']}</span>", unsafe_allow_html=True)
-                if st.button(f"👉 選擇此影片", key=vid['id']):
+            st.markdown("### 🔥 熱門影片列表")
+            # 整張清單只用一個 dataframe 元件，點列就選片，不必每支影片各放一顆按鈕
+            results = st.session_state.search_results
+            table = pd.DataFrame({
+                "標題": [("🔥 " if v['raw_views'] > 500000 else "") + v['title'] for v in results],
+                "觀看": [v['views'] for v in results],
+                "日期": [v['date'] for v in results],
+                "連結": [v['url'] for v in results],
+            })
+            event = st.dataframe(
+                table, key="video_table", on_select="rerun", selection_mode="single-row",
+                hide_index=True, **_DATAFRAME_STRETCH,
+                column_config={"連結": st.column_config.LinkColumn(display_text="▶️")}
+            )
+            if event.selection.rows:
+                vid = results[event.selection.rows[0]]
+                if vid['id'] != st.session_state.selected_video['id']:
                     st.session_state.selected_video = vid
-                    for k in list(st.session_state.keys()):
-                        if k.startswith('ai_'): del st.session_state[k]
-                    st.rerun()
-                st.divider()
+                    _reset_ai_state()
 
         with col_detail:
             selected = st.session_state.get('selected_video')
-            if selected:
-                st.info(f"✅ 當前分析：{selected['title']}")
-                st.video(selected['url'])
-                
-                model_options = get_valid_models(keys["gemini"])
-                selected_model_name = st.selectbox("🤖 選擇 AI 模型 (建議選 3.0 Pro)", model_options)
-                
-                if st.button("✨ 生成 Veo 專家級腳本 (自動存檔)", type="primary"):
-                    if not selected_model_name: st.error("請檢查 AI 模型")
-                    else:
-                        with st.spinner("AI 導演正在構思分鏡與光影..."):
-                            ai_data = generate_creative_content(selected['title'], selected['desc'], keys['gemini'], selected_model_name)
-                            
-                            if "error" not in ai_data:
-                                ai_data['url'] = selected['url'] 
-                                st.session_state.ai_data_full = ai_data
-                                if save_to_sheet(ai_data, keys['gcp_json']):
-                                    st.toast("✅ 資料已成功寫入 Google Sheets!", icon="💾")
-                            else:
-                                st.error(f"生成失敗: {ai_data['error']}")
-
-                if 'ai_data_full' in st.session_state:
-                    data = st.session_state.ai_data_full
-                    if 'token_usage' in data:
-                        u = data['token_usage']
-                        cost_twd = ((u['input']/1e6 * 2.0) + (u['output']/1e6 * 12.0)) * 32.5
-                        st.markdown(f"""
-                        <div class="cost-box">
-                            <b>💰 本次成本:</b> 輸入 {u['input']} / 輸出 {u['output']}<br>
-                            <b>預估費用: {cost_twd:.4f} TWD</b>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                    st.subheader("🎨 生成內容 (Veo 專家指令)")
-                    
-                    # 優化顯示：直接讓使用者好複製
-                    st.info("💡 請複製下方指令，貼到 VideoFX (Gemini Advanced)：")
-                    st.code(data.get('veo_prompt',''), language="text")
-                    
-                    st.divider()
-                    st.text_input("中文標題", value=data.get('title_zh',''))
-                    st.text_area("中文腳本", value=data.get('script_zh',''), height=120)
-                    st.text_area("SEO 標籤", value=data.get('tags',''), height=60)
+            if selected: render_detail(selected)
+            auto_flush()